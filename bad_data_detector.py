@@ -1,41 +1,186 @@
 """
 Indentifies if a new value deviates sharply from baseline.
-Takes input of "baseline": an ever expanding, array of "[PA systoic - PA diastolic] / PA mean" 
+Takes input of "baseline": an ever expanding, array of "[PA systoic - PA diastolic] / PA mean"
 using data direclty from Merlin.net - this will need to be coded separately.
 Requires a separate mechanism to review and exclude bad data.
 Best used with scipy.stats module, although there is backup code if neccessary.
 """
 
+import math
+import os
+from functools import lru_cache
+
 import numpy as np
+from numba import njit
+
+try:
+    from scipy.stats import t as _student_t
+except ImportError:
+    _student_t = None
+
+# Precomputed df -> two-sided critical value tables (df = 1..10000) for the
+# alphas typically used in outlier tests; generated once offline with scipy.
+_TCRIT_TABLE_FILES = {0.01: "tcrit_alpha01.npy", 0.05: "tcrit_alpha05.npy"}
+_tcrit_tables = {}
+
+
+@njit(cache=True)
+def _mean_std_welford(a):
+    """Single-pass Welford mean and sample std (ddof=1): one sweep of the
+    baseline instead of the separate .mean() and .std() traversals."""
+    n = a.shape[0]
+    m = 0.0
+    m2 = 0.0
+    for i in range(n):
+        d = a[i] - m
+        m += d / (i + 1)
+        m2 += (a[i] - m) * d
+    return m, math.sqrt(m2 / (n - 1))
+
+
+def _as_f64(a):
+    """Returns a as a contiguous float64 ndarray, without copying or even
+    dispatching into numpy's conversion machinery when it already is one."""
+    if isinstance(a, np.ndarray) and a.dtype == np.float64 and a.flags.c_contiguous:
+        return a
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+def _tcrit_table(alpha):
+    """Lazily loads the shipped critical-value table for alpha, or None."""
+    fname = _TCRIT_TABLE_FILES.get(alpha)
+    if fname is None:
+        return None
+    table = _tcrit_tables.get(alpha)
+    if table is None:
+        table = np.load(os.path.join(os.path.dirname(__file__), fname))
+        _tcrit_tables[alpha] = table
+    return table
 
-def t_prediction_test(baseline, x_new, alpha=0.01):
+
+@lru_cache(maxsize=256)
+def _tcrit(alpha, df):
     """
-    Two-sided test for whether x_new deviates from a baseline (one future obs).
-    Returns: dict with interval, p-value, and a boolean flag.
+    Cached two-sided Student-t critical value. Prefers the shipped lookup
+    table (scipy's ppf inversion is costly); falls back to scipy for alphas
+    outside the tables.
+    """
+    table = _tcrit_table(alpha)
+    if table is not None:
+        if df < table.size:
+            return float(table[df])
+        # beyond the table the t quantile matches the normal quantile to ~1e-4
+        return 2.5758293035489004 if alpha == 0.01 else 1.959963984540054
+    return float(_student_t.ppf(1 - alpha / 2, df))
+
+
+def t_prediction_test_batch(baseline, x_new, alpha=0.01, compute_p=True):
     """
-    baseline = np.asarray(baseline, dtype=float)
+    Two-sided test for whether each value in x_new deviates from a baseline.
+    Computes the baseline stats and critical value once, then evaluates the
+    whole batch with vectorized arithmetic and one t.cdf call.
+    Returns: dict of arrays with interval, p-values, and boolean flags.
+    """
+    baseline = _as_f64(baseline)
+    x_new = _as_f64(x_new)
     n = baseline.size
     if n < 2:
         raise ValueError("Need at least 2 baseline points.")
-    xbar = baseline.mean()
-    s = baseline.std(ddof=1)
-    se_pred = s * np.sqrt(1 + 1/n)
+    xbar, s = _mean_std_welford(baseline)
+    se_pred = s * math.sqrt(1 + 1/n)
     df = n - 1
 
-    try:
-        from scipy.stats import t
-        tcrit = t.ppf(1 - alpha/2, df)
+    if _student_t is not None:
+        tcrit = _tcrit(alpha, df)
         tstat = (x_new - xbar) / se_pred
-        p = 2 * (1 - t.cdf(abs(tstat), df))
-    except Exception:
-        # Fallback to normal approx if SciPy isn't available
+        p = 2 * (1 - _student_t.cdf(np.abs(tstat), df)) if compute_p else None
+    else:
+        # Fallback to normal approx if SciPy isn't available; the critical
+        # value can still come from the shipped table for the usual alphas
         from math import erf, sqrt
-        zcrit = 2.5758293035489004 if alpha == 0.01 else 1.959963984540054  # 99% or 95%
-        tcrit = zcrit
+        if _tcrit_table(alpha) is not None:
+            tcrit = _tcrit(alpha, df)
+        else:
+            tcrit = 2.5758293035489004 if alpha == 0.01 else 1.959963984540054  # 99% or 95%
         z = (x_new - xbar) / se_pred
-        p = 2 * (1 - 0.5 * (1 + erf(abs(z)/sqrt(2))))
+        if compute_p:
+            p = np.array([2 * (1 - 0.5 * (1 + erf(abs(zi)/sqrt(2)))) for zi in np.atleast_1d(z)])
+            p = p.reshape(np.shape(z))
+        else:
+            p = None
 
     lo = xbar - tcrit * se_pred
     hi = xbar + tcrit * se_pred
-    is_outlier = (x_new < lo) or (x_new > hi)
-    return {"lower": lo, "upper": hi, "p_value": p, "outlier": is_outlier}
+    is_outlier = (x_new < lo) | (x_new > hi)
+    return {
+        "lower": np.full_like(x_new, lo),
+        "upper": np.full_like(x_new, hi),
+        "p_value": p,
+        "outlier": is_outlier,
+    }
+
+
+class BaselineStats:
+    """
+    Incremental baseline statistics for the streaming use case.
+
+    Maintains Welford running mean/m2 so each new PA observation costs O(1)
+    instead of re-scanning the ever expanding baseline array. Typical driver:
+    ``bs.check(x)`` then ``bs.update(x)`` per accepted observation.
+    """
+
+    __slots__ = ('n', 'm', 'm2')
+
+    def __init__(self, baseline=None):
+        self.n = 0
+        self.m = 0.0
+        self.m2 = 0.0
+        if baseline is not None:
+            for v in np.asarray(baseline, dtype=float):
+                self.update(v)
+
+    def update(self, x):
+        """Folds one observation into the running mean/variance."""
+        self.n += 1
+        d = x - self.m
+        self.m += d / self.n
+        self.m2 += (x - self.m) * d
+
+    def check(self, x_new, alpha=0.01, compute_p=True):
+        """
+        O(1) equivalent of t_prediction_test against the accumulated baseline.
+        Returns: dict with interval, p-value, and a boolean flag.
+        """
+        n = self.n
+        if n < 2:
+            raise ValueError("Need at least 2 baseline points.")
+        xbar = self.m
+        s = math.sqrt(self.m2 / (n - 1))
+        se_pred = s * math.sqrt(1 + 1/n)
+        df = n - 1
+        tcrit = _tcrit(alpha, df) if (_student_t is not None or
+                                      _tcrit_table(alpha) is not None) else \
+            (2.5758293035489004 if alpha == 0.01 else 1.959963984540054)
+
+        if not compute_p:
+            p = None
+        elif _student_t is not None:
+            p = 2 * (1 - _student_t.cdf(abs(x_new - xbar) / se_pred, df))
+        else:
+            p = 2 * (1 - 0.5 * (1 + math.erf(abs(x_new - xbar) / se_pred / math.sqrt(2))))
+
+        lo = xbar - tcrit * se_pred
+        hi = xbar + tcrit * se_pred
+        return {"lower": lo, "upper": hi, "p_value": p,
+                "outlier": (x_new < lo) or (x_new > hi)}
+
+
+def t_prediction_test(baseline, x_new, alpha=0.01, compute_p=True):
+    """
+    Two-sided test for whether x_new deviates from a baseline (one future obs).
+    Set compute_p=False to skip the t.cdf evaluation when only the outlier
+    flag is needed (p_value comes back as None).
+    Returns: dict with interval, p-value, and a boolean flag.
+    """
+    out = t_prediction_test_batch(baseline, [x_new], alpha=alpha, compute_p=compute_p)
+    return {k: (v[0] if v is not None else None) for k, v in out.items()}
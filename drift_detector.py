@@ -4,7 +4,254 @@ Indentifies subtle directional changes over time AKA drift
 """
 
 from typing import Dict, List
+
 import numpy as np
+from scipy.signal import lfilter
+
+try:
+    from numba import njit, prange, types
+    from numba import float32, float64, int64
+    _HAVE_NUMBA = True
+except ImportError:
+    # backup code below keeps the detector working without numba
+    _HAVE_NUMBA = False
+
+if _HAVE_NUMBA:
+    # Fixed signatures (float64 and float32 state) so the kernels compile at
+    # import time and subsequent imports load straight from the numba cache,
+    # instead of paying ~1s of lazy JIT on the first detector call.
+    _CUSUM_SIG = [
+        types.Tuple((int64[:], int64))(float64[:], float64, float64, int64,
+                                       float64[:], float64[:]),
+        types.Tuple((int64[:], int64))(float32[:], float64, float64, int64,
+                                       float32[:], float32[:]),
+    ]
+    _CUSUM_ALARMS_SIG = [
+        types.Tuple((int64[:], int64))(float64[:], float64, float64, int64),
+        types.Tuple((int64[:], int64))(float32[:], float64, float64, int64),
+    ]
+    _CUSUM_BATCH_SIG = [
+        types.void(float64[:, :], float64, float64, int64,
+                   float64[:, :], float64[:, :], int64[:, :], int64[:]),
+        types.void(float32[:, :], float64, float64, int64,
+                   float32[:, :], float32[:, :], int64[:, :], int64[:]),
+    ]
+
+    @njit(_CUSUM_SIG, cache=True, fastmath=True)
+    def _cusum_core(z, k, h, warmup, S_plus, S_minus):
+        """
+        Compiled CUSUM stage for detect_drift_ewcusum.
+
+        The reset-on-alarm semantics make this recursion inherently sequential,
+        so it stays a loop while the EWMA stages are vectorized upstream. Fills
+        S_plus/S_minus in place and returns a preallocated alarm-index buffer
+        together with the number of alarms raised.
+        """
+        n = z.shape[0]
+        # Worst case is one alarm per post-warmup sample, so n slots always fit;
+        # a flat buffer avoids the boxing and regrowth of a reflected list.
+        alarms_buf = np.empty(n, dtype=np.int64)
+        n_alarms = 0
+        S_plus_t = 0.0
+        S_minus_t = 0.0
+
+        for t in range(n):
+            # one-sided CUSUM updates (in z-units); the clamp-at-zero is written
+            # branchless-friendly so LLVM lowers it to a max instruction
+            S_plus_t = S_plus_t + z[t] - k
+            if S_plus_t < 0.0:
+                S_plus_t = 0.0
+            S_minus_t = S_minus_t - z[t] - k
+            if S_minus_t < 0.0:
+                S_minus_t = 0.0
+
+            if t >= warmup and (S_plus_t > h or S_minus_t > h):
+                alarms_buf[n_alarms] = t
+                n_alarms += 1
+                # reset statistics for quick re-arm
+                S_plus_t = 0.0
+                S_minus_t = 0.0
+
+            S_plus[t] = S_plus_t
+            S_minus[t] = S_minus_t
+
+        return alarms_buf, n_alarms
+
+    @njit(_CUSUM_ALARMS_SIG, cache=True, fastmath=True)
+    def _cusum_core_alarms(z, k, h, warmup):
+        """
+        Alarms-only CUSUM stage: state stays in registers and the S_plus/S_minus
+        path arrays are never allocated or written, saving 2n stores when the
+        caller only wants alarm indices.
+        """
+        n = z.shape[0]
+        alarms_buf = np.empty(n, dtype=np.int64)
+        n_alarms = 0
+        S_plus_t = 0.0
+        S_minus_t = 0.0
+
+        for t in range(n):
+            S_plus_t = S_plus_t + z[t] - k
+            if S_plus_t < 0.0:
+                S_plus_t = 0.0
+            S_minus_t = S_minus_t - z[t] - k
+            if S_minus_t < 0.0:
+                S_minus_t = 0.0
+            if t >= warmup and (S_plus_t > h or S_minus_t > h):
+                alarms_buf[n_alarms] = t
+                n_alarms += 1
+                S_plus_t = 0.0
+                S_minus_t = 0.0
+
+        return alarms_buf, n_alarms
+
+    @njit(_CUSUM_BATCH_SIG, cache=True, fastmath=True, parallel=True)
+    def _cusum_core_batch(z, k, h, warmup, S_plus, S_minus, alarms_buf, n_alarms):
+        """
+        CUSUM stage over K independent channels in one kernel.
+
+        Channel state lives in structure-of-arrays form and each channel's
+        sequential recursion runs on its own prange lane, so a Python-level
+        loop over channels (and its per-call JIT re-entry) is avoided.
+        """
+        K, n = z.shape
+        for c in prange(K):
+            Sp = 0.0
+            Sm = 0.0
+            cnt = 0
+            for t in range(n):
+                Sp = Sp + z[c, t] - k
+                if Sp < 0.0:
+                    Sp = 0.0
+                Sm = Sm - z[c, t] - k
+                if Sm < 0.0:
+                    Sm = 0.0
+                if t >= warmup and (Sp > h or Sm > h):
+                    alarms_buf[c, cnt] = t
+                    cnt += 1
+                    Sp = 0.0
+                    Sm = 0.0
+                S_plus[c, t] = Sp
+                S_minus[c, t] = Sm
+            n_alarms[c] = cnt
+
+
+def _cusum_prefix_numpy(z, k, h, warmup):
+    """
+    Vectorized NumPy backup for the CUSUM stage, used when numba is missing.
+
+    The zero-clipped recursion S[t] = max(0, S[t-1] + u[t]) has the closed
+    form S[t] = cs[t] - min(0, running_min(cs)[t]) with cs the prefix sum of
+    u, so between alarm resets both paths collapse into one cumsum plus one
+    running minimum. Only the (rare) alarm resets restart the scan, keeping
+    the work near O(n) in the stationary regime.
+    """
+    n = z.shape[0]
+    u = z - k
+    v = -z - k
+    S_plus = np.empty(n, dtype=z.dtype)
+    S_minus = np.empty(n, dtype=z.dtype)
+    alarms: List[int] = []
+    start = 0
+    while start < n:
+        cs = np.cumsum(u[start:])
+        Sp = cs - np.minimum(np.minimum.accumulate(cs), 0.0)
+        cs = np.cumsum(v[start:])
+        Sm = cs - np.minimum(np.minimum.accumulate(cs), 0.0)
+        trig = np.flatnonzero((Sp > h) | (Sm > h))
+        trig = trig[trig + start >= warmup]
+        if trig.size == 0:
+            S_plus[start:] = Sp
+            S_minus[start:] = Sm
+            break
+        j = trig[0]
+        t = start + j
+        S_plus[start:t] = Sp[:j]
+        S_minus[start:t] = Sm[:j]
+        # reset statistics for quick re-arm
+        S_plus[t] = 0.0
+        S_minus[t] = 0.0
+        alarms.append(t)
+        start = t + 1
+    return np.asarray(alarms, dtype=np.int64), S_plus, S_minus
+
+
+def detect_drift_ewcusum_batch(
+    X: np.ndarray,
+    alpha_baseline: float = 0.01,
+    alpha_var: float = 0.05,
+    delta: float = 0.25,
+    h: float = 5.0,
+    warmup: int = 100,
+    clip_z: float = 6.0,
+    dtype=np.float64
+) -> Dict[str, object]:
+    """
+    detect_drift_ewcusum over K concurrent channels, X shaped (K, n).
+
+    The EWMA stages run as single lfilter calls along the time axis and the
+    CUSUM stage runs all channels in one parallel kernel.
+
+    Returns
+    -------
+    dict:
+      'alarms'  : list of K index arrays, one per channel
+      'mu', 'sigma', 'S_plus', 'S_minus' : (K, n) arrays
+    """
+    if not (isinstance(X, np.ndarray) and X.dtype == dtype and X.flags.c_contiguous):
+        X = np.ascontiguousarray(X, dtype=dtype)
+    if X.ndim != 2:
+        raise ValueError("X must be a 2-D (channels, time) array.")
+    K, n = X.shape
+    if n == 0:
+        empty = np.zeros((K, 0), dtype=dtype)
+        return {"alarms": [np.array([], dtype=np.int64) for _ in range(K)],
+                "mu": empty, "sigma": empty.copy(),
+                "S_plus": empty.copy(), "S_minus": empty.copy()}
+
+    a_b = alpha_baseline
+    mu, _ = lfilter([a_b], [1.0, -(1.0 - a_b)], X, axis=1,
+                    zi=(X[:, :1] * (1.0 - a_b)))
+    mu = mu.astype(dtype, copy=False)
+    r = X - mu
+    a_v = alpha_var
+    var, _ = lfilter([a_v], [1.0, -(1.0 - a_v)], r * r, axis=1,
+                     zi=np.full((K, 1), 1e-6 * (1.0 - a_v)))
+    sig = np.sqrt(np.maximum(var, 1e-12)).astype(dtype, copy=False)
+
+    z = r / (sig + 1e-12)
+    if clip_z is not None:
+        np.clip(z, -clip_z, clip_z, out=z)
+
+    S_plus = np.zeros((K, n), dtype=dtype)
+    S_minus = np.zeros((K, n), dtype=dtype)
+    k = delta / 2.0
+
+    if _HAVE_NUMBA:
+        alarms_buf = np.empty((K, n), dtype=np.int64)
+        n_alarms = np.zeros(K, dtype=np.int64)
+        _cusum_core_batch(z, k, h, warmup, S_plus, S_minus, alarms_buf, n_alarms)
+        alarms = [alarms_buf[c, :n_alarms[c]].copy() for c in range(K)]
+    else:
+        alarms = []
+        for c in range(K):
+            a, S_plus[c], S_minus[c] = _cusum_prefix_numpy(z[c], k, h, warmup)
+            alarms.append(a)
+
+    return {
+        "alarms": alarms,
+        "mu": mu,
+        "sigma": sig,
+        "S_plus": S_plus,
+        "S_minus": S_minus,
+    }
+
+
+def _ewma(x, alpha, init):
+    """First-order IIR EWMA of x computed in one C call via lfilter."""
+    y, _ = lfilter([alpha], [1.0, -(1.0 - alpha)], x, zi=[init * (1.0 - alpha)])
+    return y
+
 
 def detect_drift_ewcusum(
     x: np.ndarray,
@@ -13,7 +260,9 @@ def detect_drift_ewcusum(
     delta: float = 0.25,            # target shift size in σ units (0.25–0.5 for subtle drift)
     h: float = 5.0,                 # decision threshold; larger -> fewer false alarms
     warmup: int = 100,              # burn-in for stable stats
-    clip_z: float = 6.0             # winsorize to reduce heavy-tail spikes
+    clip_z: float = 6.0,            # winsorize to reduce heavy-tail spikes
+    dtype=np.float64,               # np.float32 halves state bandwidth at large n
+    return_paths: bool = True       # False: alarms only, skip path-array writes
 ) -> Dict[str, np.ndarray]:
     """
     Online subtle-drift detector using EWMA baseline + one-sided CUSUM on standardized residuals.
@@ -26,55 +275,51 @@ def detect_drift_ewcusum(
       'sigma'   : EWMA std estimate
       'S_plus'  : upward CUSUM path
       'S_minus' : downward CUSUM path
+    With return_paths=False only 'alarms' is returned; the CUSUM state stays
+    in registers and the per-sample path arrays are never written.
     """
-    x = np.asarray(x, dtype=float)
+    # skip the conversion dispatch when x already has the right layout
+    if not (isinstance(x, np.ndarray) and x.dtype == dtype and x.flags.c_contiguous):
+        x = np.ascontiguousarray(x, dtype=dtype)
     n = len(x)
     if n == 0:
+        if not return_paths:
+            return {"alarms": np.array([])}
         return {"alarms": np.array([]), "mu": np.array([]), "sigma": np.array([]),
                 "S_plus": np.array([]), "S_minus": np.array([])}
 
-    mu = np.zeros(n)
-    sig = np.zeros(n)
-    S_plus = np.zeros(n)
-    S_minus = np.zeros(n)
+    # EWMA baseline and variance are linear first-order recursions, so both
+    # run as single lfilter calls instead of a Python loop.
+    mu = _ewma(x, alpha_baseline, x[0]).astype(dtype, copy=False)
+    r = x - mu
+    var = _ewma(r * r, alpha_var, 1e-6)
+    sig = np.sqrt(np.maximum(var, 1e-12)).astype(dtype, copy=False)
+
+    # standardized, winsorized residuals
+    z = r / (sig + 1e-12)
+    if clip_z is not None:
+        np.clip(z, -clip_z, clip_z, out=z)
 
-    # initialize with first value
-    mu_t = x[0]
-    var_t = 1e-6
     k = delta / 2.0  # standard CUSUM reference value for best sensitivity to shift δ
 
-    alarms: List[int] = []
+    if not return_paths:
+        if _HAVE_NUMBA:
+            alarms_buf, n_alarms = _cusum_core_alarms(z, k, h, warmup)
+            alarms = alarms_buf[:n_alarms].copy()
+        else:
+            alarms, _, _ = _cusum_prefix_numpy(z, k, h, warmup)
+        return {"alarms": alarms}
 
-    for t in range(n):
-        # update slow baseline (tracks very slow background changes)
-        mu_t = (1 - alpha_baseline) * mu_t + alpha_baseline * x[t]
-        mu[t] = mu_t
-
-        # standardized residual using EWMA variance
-        r = x[t] - mu_t
-        var_t = (1 - alpha_var) * var_t + alpha_var * (r * r)
-        sigma_t = float(np.sqrt(max(var_t, 1e-12)))
-        sig[t] = sigma_t
-
-        z = r / (sigma_t + 1e-12)
-        # winsorize to protect against single spikes
-        if clip_z is not None:
-            z = float(np.clip(z, -clip_z, clip_z))
-
-        # one-sided CUSUM updates (in z-units)
-        S_plus_t = max(0.0, (S_plus[t-1] if t else 0.0) + z - k)
-        S_minus_t = max(0.0, (S_minus[t-1] if t else 0.0) - z - k)
-        S_plus[t] = S_plus_t
-        S_minus[t] = S_minus_t
-
-        if t >= warmup and (S_plus_t > h or S_minus_t > h):
-            alarms.append(t)
-            # reset statistics for quick re-arm
-            S_plus[t] = 0.0
-            S_minus[t] = 0.0
+    if _HAVE_NUMBA:
+        S_plus = np.zeros(n, dtype=dtype)
+        S_minus = np.zeros(n, dtype=dtype)
+        alarms_buf, n_alarms = _cusum_core(z, k, h, warmup, S_plus, S_minus)
+        alarms = alarms_buf[:n_alarms].copy()
+    else:
+        alarms, S_plus, S_minus = _cusum_prefix_numpy(z, k, h, warmup)
 
     return {
-        "alarms": np.array(alarms, dtype=int),
+        "alarms": alarms,
         "mu": mu,
         "sigma": sig,
         "S_plus": S_plus,
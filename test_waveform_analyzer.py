@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from waveform_analyzer import analyze_waveform, find_pa_mean
+from waveform_analyzer import analyze_waveform, find_pa_mean, waveform_to_pa_mean
 
 class TestWaveformAnalyzer(unittest.TestCase):
 
@@ -92,5 +92,31 @@ class TestFindPaMean(unittest.TestCase):
         self.assertAlmostEqual(find_pa_mean(bins), 4.5)
 
 
+class TestWaveformToPaMean(unittest.TestCase):
+
+    def test_matches_two_stage_pipeline(self):
+        """Tests that the fused function matches analyze_waveform + find_pa_mean."""
+        waveform = [[10.2, 0.0], [15.5, 0.05], [20.5, 0.1], [25.1, 0.15],
+                    [30.9, 0.2], [10.4, 0.35], [20.6, 0.5]]
+        expected = find_pa_mean(analyze_waveform(waveform))
+        self.assertAlmostEqual(waveform_to_pa_mean(waveform), expected)
+
+    def test_matches_two_stage_pipeline_floor(self):
+        """Tests the fused function against the pipeline with floor quantization."""
+        waveform = [[10.2, 0.0], [20.5, 0.2], [10.8, 0.4]]
+        expected = find_pa_mean(analyze_waveform(waveform, quantize_mode="floor"))
+        self.assertAlmostEqual(waveform_to_pa_mean(waveform, quantize_mode="floor"),
+                               expected)
+
+    def test_empty_waveform(self):
+        """Tests the fused function with an empty waveform."""
+        self.assertIsNone(waveform_to_pa_mean([]))
+
+    def test_invalid_quantize_mode(self):
+        """Tests that an invalid quantize mode raises a ValueError."""
+        with self.assertRaises(ValueError):
+            waveform_to_pa_mean([[10.2, 0.0]], quantize_mode="invalid")
+
+
 if __name__ == '__main__':
     unittest.main()
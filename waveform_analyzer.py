@@ -5,6 +5,23 @@ Returns the unweighted mean of the most stable section of the waveform.
 """
 
 import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _blanking_mask(times, blanking_time, keep):
+    """
+    Marks which samples survive the blanking window.
+
+    Sequential by construction: a rejected sample does not advance the
+    blanking clock, so this cannot be expressed as a pure array operation.
+    """
+    last_time = -blanking_time  # Initialize to allow the first event to be recorded.
+    for i in range(times.shape[0]):
+        if times[i] - last_time >= blanking_time:
+            keep[i] = True
+            last_time = times[i]
+
 
 def analyze_waveform(waveform, blanking_time=0.1, quantize_mode="round"):
     """
@@ -21,36 +38,98 @@ def analyze_waveform(waveform, blanking_time=0.1, quantize_mode="round"):
     if not waveform:
         return np.array([])
 
-    # Find the maximum pressure to determine the size of the bins array.
-    # We assume pressures are non-negative.
-    max_pressure = 0
-    if waveform:
-        if quantize_mode == "round":
-            max_pressure = int(np.round(max(p for p, t in waveform))) + 1
-        else:
-            max_pressure = int(max(p for p, t in waveform)) + 1
+    if quantize_mode not in ("round", "floor"):
+        raise ValueError("quantize_mode must be 'round' or 'floor'")
 
+    arr = np.asarray(waveform, dtype=float)
 
-    bins = np.zeros(max_pressure, dtype=int)
-    last_time = -blanking_time  # Initialize to allow the first event to be recorded.
-
-    for pressure, time in waveform:
-        if time - last_time >= blanking_time:
-            if quantize_mode == "round":
-                pressure_int = int(np.round(pressure))
-            elif quantize_mode == "floor":
-                pressure_int = int(pressure)
-            else:
-                raise ValueError("quantize_mode must be 'round' or 'floor'")
-
-            if 0 <= pressure_int < max_pressure:
-                bins[pressure_int] += 1
-            last_time = time
+    # Find the maximum pressure to determine the size of the bins array.
+    # We assume pressures are non-negative.
+    col0 = arr[:, 0]
+    if quantize_mode == "round":
+        # builtin round matches np.rint's banker's rounding without the
+        # 0-d ndarray round trip
+        max_pressure = round(float(col0.max())) + 1
+        p_int = np.rint(col0).astype(np.int64)
+    else:
+        max_pressure = int(col0.max()) + 1
+        p_int = col0.astype(np.int64)
+
+    keep = np.zeros(arr.shape[0], dtype=np.bool_)
+    _blanking_mask(arr[:, 1], blanking_time, keep)
+
+    binned = p_int[keep]
+    binned = binned[(binned >= 0) & (binned < max_pressure)]
+    return np.bincount(binned, minlength=max_pressure)
+
+
+@njit(cache=True)
+def _waveform_pa_mean_core(p_int, times, blanking_time, max_pressure):
+    """
+    Fused binning + mode-median kernel for waveform_to_pa_mean.
 
-    return bins
+    Fills a local bins array with the blanking logic and hands it straight
+    to _find_pa_mean_core, so the intermediate bins never surface as a
+    Python-level ndarray between the two stages.
+    """
+    bins = np.zeros(max_pressure, dtype=np.int64)
+    last_time = -blanking_time
+    for i in range(times.shape[0]):
+        if times[i] - last_time >= blanking_time:
+            p = p_int[i]
+            if 0 <= p < max_pressure:
+                bins[p] += 1
+            last_time = times[i]
+    return _find_pa_mean_core(bins)
+
+
+@njit(cache=True)
+def _find_pa_mean_core(bins):
+    """
+    Compiled mode-of-counts median for find_pa_mean.
 
+    A few tight typed loops with one small frequency-table allocation;
+    returns -1.0 when there are no non-zero counts.
+    """
+    n = bins.size
+    max_c = 0
+    for i in range(n):
+        if bins[i] > max_c:
+            max_c = bins[i]
+    if max_c == 0:
+        return -1.0
+
+    # frequency of each non-zero count value
+    freq = np.zeros(max_c + 1, dtype=np.int64)
+    for i in range(n):
+        if bins[i] > 0:
+            freq[bins[i]] += 1
+
+    # mode of the counts, ties broken by the highest count
+    max_freq = 0
+    modal_count = 0
+    for c in range(1, max_c + 1):
+        if freq[c] >= max_freq and freq[c] > 0:
+            max_freq = freq[c]
+            modal_count = c
+
+    # median of the (ascending) bin indices holding the modal count
+    m = freq[modal_count]
+    lo_rank = (m - 1) // 2
+    hi_rank = m // 2
+    lo_idx = 0
+    hi_idx = 0
+    seen = 0
+    for i in range(n):
+        if bins[i] == modal_count:
+            if seen == lo_rank:
+                lo_idx = i
+            if seen == hi_rank:
+                hi_idx = i
+                break
+            seen += 1
+    return (lo_idx + hi_idx) / 2.0
 
-from collections import Counter
 
 def find_pa_mean(bins):
     """
@@ -63,22 +142,43 @@ def find_pa_mean(bins):
         float: The median of the bin indices that match the modal count.
                Returns None if there are no non-zero counts.
     """
-    non_zero_counts = bins[bins > 0]
-    if non_zero_counts.size == 0:
+    bins = np.asarray(bins, dtype=np.int64)
+    if bins.size == 0:
         return None
+    result = _find_pa_mean_core(bins)
+    return None if result < 0.0 else result
+
+
+def waveform_to_pa_mean(waveform, blanking_time=0.1, quantize_mode="round"):
+    """
+    Fused analyze_waveform + find_pa_mean in one compiled pass.
 
-    # Find the mode of all non-zero counts
-    count_frequencies = Counter(non_zero_counts)
-    max_freq = max(count_frequencies.values())
-    modes = [count for count, freq in count_frequencies.items() if freq == max_freq]
-    modal_count = max(modes)
+    Equivalent to find_pa_mean(analyze_waveform(...)) but bins and reduces
+    inside a single kernel, for streaming callers that only want the scalar.
 
-    # Select all bins from the original array that have the modal count
-    final_bin_indices = np.where(bins == modal_count)[0]
+    Args:
+        waveform (list): A list of [pressure, time] pairs.
+        blanking_time (float): The time in seconds to ignore subsequent pressures.
+        quantize_mode (str): The quantization mode, either "round" or "floor".
 
-    if final_bin_indices.size == 0:
-        # This case should ideally not be reached if non_zero_counts is not empty
+    Returns:
+        float: The representative pressure, or None if no samples were binned.
+    """
+    if not waveform:
         return None
 
-    # Return the median of the resulting bin indices
-    return np.median(final_bin_indices)
+    if quantize_mode not in ("round", "floor"):
+        raise ValueError("quantize_mode must be 'round' or 'floor'")
+
+    arr = np.asarray(waveform, dtype=float)
+    col0 = arr[:, 0]
+    if quantize_mode == "round":
+        max_pressure = round(float(col0.max())) + 1
+        p_int = np.rint(col0).astype(np.int64)
+    else:
+        max_pressure = int(col0.max()) + 1
+        p_int = col0.astype(np.int64)
+
+    result = _waveform_pa_mean_core(p_int, np.ascontiguousarray(arr[:, 1]),
+                                    blanking_time, max_pressure)
+    return None if result < 0.0 else result